@@ -8,6 +8,7 @@
 from __future__ import annotations
 
 import sys
+from collections.abc import Callable
 
 import numpy as np
 from discretize import TreeMesh
@@ -17,11 +18,18 @@ from geoapps_utils.locations import get_locations
 from geoh5py.objects import Curve, ObjectBase, Octree, Points, Surface
 from geoh5py.shared.utils import fetch_active_workspace
 from geoh5py.ui_json import utils
-from scipy import interpolate
-from scipy.spatial import Delaunay, cKDTree
 
 from octree_creation_app.params import OctreeParams
-from octree_creation_app.utils import densify_curve, treemesh_2_octree
+from octree_creation_app.utils import (
+    array_digest,
+    densify_curve,
+    morton_order,
+    rasterize_triangulation,
+    surface_tree,
+    surface_triangulation,
+    treemesh_2_octree,
+    vertex_normals,
+)
 
 
 class OctreeDriver(BaseDriver):
@@ -39,20 +47,69 @@ class OctreeDriver(BaseDriver):
     def run(self) -> Octree:
         """
         Create an octree mesh from input values
+
+        The workspace is only held while loading the input geometries and
+        while writing out the resulting octree, not during refinement.
         """
+        with fetch_active_workspace(self.params.geoh5, mode="r"):
+            self.load_inputs(self.params)
+
+        mesh = self.treemesh_from_params(self.params)
+
         with fetch_active_workspace(self.params.geoh5, mode="r+"):
-            octree = self.octree_from_params(self.params)
+            octree = treemesh_2_octree(
+                self.params.geoh5, mesh, name=self.params.ga_group_name
+            )
             self.update_monitoring_directory(octree)
 
         return octree
 
+    @staticmethod
+    def load_inputs(params: OctreeParams):
+        """
+        Read the geometries of the core and refinement objects in memory.
+
+        :param params: Parameters of the octree mesh creation.
+        """
+        entities = [params.objects] + [
+            getattr(params, value["object"])
+            for value in params.free_parameter_dict.values()
+        ]
+        for entity in entities:
+            if not isinstance(entity, ObjectBase):
+                continue
+
+            for attribute in ["vertices", "cells", "centroids"]:
+                getattr(entity, attribute, None)
+
     @staticmethod
     def minimum_level(mesh: TreeMesh, level: int):
         """Computes the minimum level of refinement for a given tree mesh."""
         return max([1, mesh.max_level - level + 1])
 
     @staticmethod
-    def octree_from_params(params: OctreeParams):
+    def octree_from_params(params: OctreeParams) -> Octree:
+        """
+        Create an octree mesh in the workspace from input values.
+
+        :param params: Parameters of the octree mesh creation.
+
+        :return: Octree mesh.
+        """
+        mesh = OctreeDriver.treemesh_from_params(params)
+        octree = treemesh_2_octree(params.geoh5, mesh, name=params.ga_group_name)
+
+        return octree
+
+    @staticmethod
+    def treemesh_from_params(params: OctreeParams) -> TreeMesh:
+        """
+        Create and refine a finalized tree mesh from input values.
+
+        :param params: Parameters of the octree mesh creation.
+
+        :return: Refined tree mesh.
+        """
         print("Setting the mesh extent")
         entity = params.objects
         mesh: TreeMesh = mesh_builder_xyz(
@@ -71,51 +128,59 @@ class OctreeDriver(BaseDriver):
             minimum_level, finalize=False, diagonal_balance=params.diagonal_balance
         )
 
+        refiners: dict[str, Callable[..., TreeMesh]] = {
+            "surface": OctreeDriver.refine_tree_from_surface,
+            "curve": OctreeDriver.refine_tree_from_curve,
+            "triangulation": OctreeDriver.refine_tree_from_triangulation,
+            "points": OctreeDriver.refine_tree_from_points,
+        }
+        plan = OctreeDriver.refinement_plan(params)
+        for label, kind, refinement_object, levels, kwargs in plan:
+            print(f"Applying {label} on: {refinement_object.name}")
+            mesh = refiners[kind](mesh, refinement_object, levels, **kwargs)
+
+        print("Finalizing . . .")
+        mesh.finalize()
+
+        return mesh
+
+    @staticmethod
+    def refinement_plan(params: OctreeParams) -> list[tuple]:
+        """
+        Collect the active refinements from the free parameters.
+
+        :param params: Parameters of the octree mesh creation.
+
+        :return: List of (label, kind, object, levels, kwargs) for each
+            refinement, with kind one of 'surface', 'curve', 'triangulation'
+            or 'points'.
+        """
+        plan = []
         for label, value in params.free_parameter_dict.items():
             refinement_object = getattr(params, value["object"])
-            levels = utils.str2list(getattr(params, value["levels"]))
             if not isinstance(refinement_object, ObjectBase):
                 continue
 
-            print(f"Applying {label} on: {getattr(params, value['object']).name}")
+            levels = np.asarray(utils.str2list(getattr(params, value["levels"])))
+            kwargs = {"diagonal_balance": params.diagonal_balance}
 
             if getattr(params, value["horizon"]):
-                mesh = OctreeDriver.refine_tree_from_surface(
-                    mesh,
-                    refinement_object,
-                    levels,
-                    params.diagonal_balance,
-                    max_distance=getattr(params, value["distance"]),
-                )
-
+                kind = "surface"
+                kwargs["max_distance"] = getattr(params, value["distance"])
             elif isinstance(refinement_object, Curve):
-                mesh = OctreeDriver.refine_tree_from_curve(
-                    mesh, refinement_object, levels, params.diagonal_balance
-                )
-
+                kind = "curve"
             elif isinstance(refinement_object, Surface):
-                mesh = OctreeDriver.refine_tree_from_triangulation(
-                    mesh, refinement_object, levels, params.diagonal_balance
-                )
-
+                kind = "triangulation"
             elif isinstance(refinement_object, Points):
-                mesh = OctreeDriver.refine_tree_from_points(
-                    mesh,
-                    refinement_object,
-                    levels,
-                    diagonal_balance=params.diagonal_balance,
-                )
-
+                kind = "points"
             else:
                 raise NotImplementedError(
                     f"Refinement for object {type(refinement_object)} is not implemented."
                 )
 
-        print("Finalizing . . .")
-        mesh.finalize()
-        octree = treemesh_2_octree(params.geoh5, mesh, name=params.ga_group_name)
+            plan.append((label, kind, refinement_object, levels, kwargs))
 
-        return octree
+        return plan
 
     @staticmethod
     def refine_tree_from_curve(
@@ -141,9 +206,6 @@ class OctreeDriver(BaseDriver):
         if not isinstance(curve, Curve):
             raise TypeError("Refinement object must be a Curve.")
 
-        if isinstance(levels, list):
-            levels = np.array(levels)
-
         locations = densify_curve(curve, mesh.h[0][0])
         mesh = OctreeDriver.refine_tree_from_points(
             mesh, locations, levels, diagonal_balance=diagonal_balance, finalize=False
@@ -183,19 +245,23 @@ class OctreeDriver(BaseDriver):
         if locations is None:
             raise ValueError("Could not find locations for refinement.")
 
-        if isinstance(levels, list):
-            levels = np.array(levels)
+        levels = np.asarray(levels)
 
-        distance = 0
-        for ii, n_cells in enumerate(levels):
-            distance += n_cells * OctreeDriver.cell_size_from_level(mesh, ii)
-            mesh.refine_ball(
-                locations,
-                distance,
-                mesh.max_level - ii,
-                diagonal_balance=diagonal_balance,
-                finalize=False,
-            )
+        # Cumulative radius of each refinement level, in a single pass
+        distances = np.cumsum(levels * mesh.h[0][0] * 2.0 ** np.arange(len(levels)))
+
+        # Levels without cells repeat the radius of a finer ball, skip them
+        active = np.flatnonzero(levels)
+
+        # Stack one ball per location and level, refined in a single call
+        n_locs = locations.shape[0]
+        mesh.refine_ball(
+            np.tile(locations, (len(active), 1)),
+            np.repeat(distances[active], n_locs),
+            np.repeat(mesh.max_level - active, n_locs),
+            diagonal_balance=diagonal_balance,
+            finalize=False,
+        )
 
         if finalize:
             mesh.finalize()
@@ -225,15 +291,46 @@ class OctreeDriver(BaseDriver):
 
         :return: Refined tree mesh.
         """
-        if isinstance(levels, list):
-            levels = np.array(levels)
+        levels = np.asarray(levels)
 
-        xyz = get_locations(surface.workspace, surface)
-        triang = Delaunay(xyz[:, :2])
-        tree = cKDTree(xyz[:, :2])
+        # Nothing to refine, skip building the geometry
+        if not np.any(levels > 0):
+            if finalize:
+                mesh.finalize()
 
-        interp = interpolate.LinearNDInterpolator(triang, xyz[:, -1])
-        levels = np.array(levels)
+            return mesh
+
+        xyz = np.ascontiguousarray(
+            get_locations(surface.workspace, surface), dtype=np.float64
+        )
+        digest = array_digest(xyz)
+        triang = surface_triangulation(xyz, digest)
+
+        # Build the grid, masks and elevations once at the finest level used,
+        # coarser levels are strided sub-samples of the same grid
+        base = int(np.flatnonzero(levels)[0])
+        cell_sizes = np.r_[mesh.h[0][0], mesh.h[1][0], mesh.h[2][0]][None, :] * (
+            2.0 ** np.arange(len(levels))[:, None]
+        )
+        dx, dy, _ = cell_sizes[base]
+        base_cells = cell_sizes[0]
+        max_level = mesh.max_level
+        n_x, n_y = np.ceil((surface.extent[1, :2] - surface.extent[0, :2]) / [dx, dy])
+        x_grid = surface.extent[0, 0] + np.arange(int(n_x)) * dx
+        y_grid = surface.extent[0, 1] + np.arange(int(n_y)) * dy
+
+        # Only keep points within triangulation
+        keeper_grid, elevation_grid = rasterize_triangulation(
+            xyz, triang.simplices, x_grid, y_grid
+        )
+
+        # Points inside the hull are always closer to a vertex than the
+        # diagonal of the vertices extent, only query the ones left to test
+        diagonal = np.linalg.norm(np.ptp(xyz[:, :2], axis=0))
+        if max_distance <= diagonal:
+            rows, cols = np.nonzero(keeper_grid)
+            r, _ = surface_tree(xyz, digest).query(np.c_[x_grid[cols], y_grid[rows]])
+            keeper_grid[rows, cols] = r < max_distance
 
         depth = 0
         # Cycle through the Tree levels backward
@@ -241,33 +338,31 @@ class OctreeDriver(BaseDriver):
             if n_cells == 0:
                 continue
 
-            dx = OctreeDriver.cell_size_from_level(mesh, ind, 0)
-            dy = OctreeDriver.cell_size_from_level(mesh, ind, 1)
-            dz = OctreeDriver.cell_size_from_level(mesh, ind, 2)
-
-            # Create a grid at the octree level in xy
-            cell_center_x, cell_center_y = np.meshgrid(
-                np.arange(surface.extent[0, 0], surface.extent[1, 0], dx),
-                np.arange(surface.extent[0, 1], surface.extent[1, 1], dy),
+            dz = cell_sizes[ind, 2]
+
+            # Sub-sample the base grid at the octree level in xy
+            stride = 2 ** (ind - base)
+            keeper = keeper_grid[::stride, ::stride]
+            rows, cols = np.nonzero(keeper)
+            xy = np.c_[x_grid[::stride][cols], y_grid[::stride][rows]]
+            elevation = elevation_grid[::stride, ::stride][rows, cols]
+
+            # Apply vertical padding for current octree level, all layers at once
+            depths = depth + dz * np.arange(1, int(n_cells) + 1)
+            depth = depths[-1]
+            locations = np.c_[
+                np.tile(xy, (len(depths), 1)),
+                (elevation[None, :] - depths[:, None]).ravel(),
+            ]
+
+            # Insert in the storage order of the tree for locality
+            locations = locations[morton_order(locations, mesh.origin, base_cells)]
+            mesh.insert_cells(
+                locations,
+                np.full(locations.shape[0], max_level - ind),
+                diagonal_balance=diagonal_balance,
+                finalize=False,
             )
-            xy = np.c_[cell_center_x.reshape(-1), cell_center_y.reshape(-1)]
-
-            # Only keep points within triangulation
-            inside = triang.find_simplex(xy) != -1
-            r, _ = tree.query(xy)
-            keeper = np.logical_and(r < max_distance, inside)
-            nnz = keeper.sum()
-            elevation = interp(xy[keeper])
-
-            # Apply vertical padding for current octree level
-            for _ in range(int(n_cells)):
-                depth += dz
-                mesh.insert_cells(
-                    np.c_[xy[keeper], elevation - depth],
-                    np.ones(nnz) * mesh.max_level - ind,
-                    diagonal_balance=diagonal_balance,
-                    finalize=False,
-                )
 
         if finalize:
             mesh.finalize()
@@ -301,34 +396,36 @@ class OctreeDriver(BaseDriver):
         if surface.vertices is None or surface.cells is None:
             raise ValueError("Surface object must have vertices and cells.")
 
-        if isinstance(levels, list):
-            levels = np.array(levels)
+        levels = np.asarray(levels)
 
-        vertices = surface.vertices.copy()
-        normals = np.cross(
-            vertices[surface.cells[:, 1], :] - vertices[surface.cells[:, 0], :],
-            vertices[surface.cells[:, 2], :] - vertices[surface.cells[:, 0], :],
-        )
-        average_normals = np.zeros((surface.n_vertices, 3))
+        # Nothing to refine, skip building the normals
+        if not np.any(levels > 0):
+            if finalize:
+                mesh.finalize()
 
-        for vert_ids in surface.cells.T:
-            average_normals[vert_ids, :] += normals
+            return mesh
 
-        average_normals /= np.linalg.norm(average_normals, axis=1)[:, None]
+        # Accumulate the normal of every triangle sharing a vertex
+        average_normals = vertex_normals(surface.vertices, surface.cells)
 
         base_cells = np.r_[mesh.h[0][0], mesh.h[1][0], mesh.h[2][0]]
-        for level, n_cells in enumerate(levels):
-            if n_cells == 0:
-                continue
-
-            for _ in range(int(n_cells)):
-                mesh.refine_surface(
-                    (vertices, surface.cells),
-                    level=-level - 1,
-                    diagonal_balance=diagonal_balance,
-                    finalize=False,
-                )
-                vertices -= average_normals * base_cells * 2.0**level
+        average_normals *= base_cells
+
+        # Level and cumulative offset along the normals of every layer
+        layers = levels.astype(int)
+        layer_levels = np.repeat(np.arange(len(levels)), layers)
+        offsets = np.cumsum(np.r_[0.0, 2.0**layer_levels])[:-1]
+
+        vertices = np.empty_like(surface.vertices, dtype=float)
+        for level, offset in zip(layer_levels, offsets):
+            np.multiply(average_normals, offset, out=vertices)
+            np.subtract(surface.vertices, vertices, out=vertices)
+            mesh.refine_surface(
+                (vertices, surface.cells),
+                level=-level - 1,
+                diagonal_balance=diagonal_balance,
+                finalize=False,
+            )
 
         if finalize:
             mesh.finalize()
@@ -22,10 +22,10 @@ class OctreeParams(BaseParams):  # pylint: disable=too-many-instance-attributes
     """
 
     def __init__(self, input_file=None, **kwargs):
-        self._default_ui_json = deepcopy(default_ui_json)
-        self._defaults = deepcopy(defaults)
+        self._defaults = dict(defaults)  # flat dict of immutable values
         self._free_parameter_keys = ["object", "levels", "horizon", "distance"]
         self._free_parameter_identifier = "refinement"
+        self._free_parameter_dict: dict | None = None
         self._objects = None
         self._u_cell_size = None
         self._v_cell_size = None
@@ -39,18 +39,20 @@ class OctreeParams(BaseParams):  # pylint: disable=too-many-instance-attributes
         self._title = None
 
         if input_file is None:
-            free_param_dict = {}
+            # Only the kwargs path builds its ui_json from the defaults, an
+            # input file is trusted as is
+            self._default_ui_json = deepcopy(default_ui_json)
+
+            # Ordered set of the refinement groups, in a single pass
+            groups: dict[str, None] = {}
             for key in kwargs:
-                if (
-                    self._free_parameter_identifier in key.lower()
-                    and "object" in key.lower()
-                ):
-                    group = key.replace("object", "").rstrip()
-                    free_param_dict[group] = deepcopy(template_dict)
+                name = key.lower()
+                if name.endswith("object") and self._free_parameter_identifier in name:
+                    groups[key[: -len("object")].rstrip()] = None
 
             ui_json = deepcopy(self._default_ui_json)
-            for group, forms in free_param_dict.items():
-                for key, form in forms.items():
+            for group in groups:
+                for key, form in deepcopy(template_dict).items():
                     form["group"] = group
 
                     if "dependency" in form:
@@ -83,6 +85,16 @@ class OctreeParams(BaseParams):  # pylint: disable=too-many-instance-attributes
             [self.vertical_padding, self.vertical_padding],
         ]
 
+    @property
+    def free_parameter_dict(self) -> dict:
+        """
+        Groups of free parameters, collected once from the ui_json.
+        """
+        if self._free_parameter_dict is None:
+            self._free_parameter_dict = super().free_parameter_dict
+
+        return self._free_parameter_dict
+
     @property
     def title(self):
         return self._title
@@ -191,6 +203,7 @@ class OctreeParams(BaseParams):  # pylint: disable=too-many-instance-attributes
             self.validator = ifile.validators
             self.validations = ifile.validations
 
+        self._free_parameter_dict = None
         self._input_file = ifile
 
     @classmethod
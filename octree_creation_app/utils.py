@@ -7,7 +7,12 @@
 
 from __future__ import annotations
 
+import hashlib
+import math
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from logging import warning
+from typing import Any
 
 import discretize
 import numpy as np
@@ -15,8 +20,67 @@ from discretize import TreeMesh
 from geoh5py import Workspace
 from geoh5py.objects import Curve, Octree
 from geoh5py.shared.utils import fetch_active_workspace
-from scipy.interpolate import interp1d
-from scipy.spatial import cKDTree
+from scipy.spatial import Delaunay, cKDTree
+
+
+class DigestCache:
+    """
+    Least recently used cache of results keyed on short digests.
+
+    Only the digests are held as keys, not the arrays they were computed
+    from, so the memory retained is bounded by the cached results.
+
+    :param maxsize: Maximum number of results kept.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._results: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __call__(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Return the result cached for a key, built on a miss.
+
+        :param key: Hashable key, usually from :func:`array_digest`.
+        :param build: Function without arguments computing the result.
+
+        :return: Cached or newly built result.
+        """
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+
+        result = build()
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+        return result
+
+    def clear(self):
+        """
+        Release all cached results.
+        """
+        self._results.clear()
+
+
+def array_digest(*arrays: np.ndarray) -> bytes:
+    """
+    Compute a short digest of the contents, types and shapes of arrays.
+
+    Contiguous arrays are hashed in place, without copies.
+
+    :param arrays: Arrays to hash.
+
+    :return: 16 bytes BLAKE2b digest.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        hasher.update(f"{array.dtype.str}{array.shape}".encode())
+        hasher.update(array.data)
+
+    return hasher.digest()
 
 
 def create_octree_from_octrees(meshes: list[Octree | TreeMesh]) -> TreeMesh:
@@ -27,61 +91,75 @@ def create_octree_from_octrees(meshes: list[Octree | TreeMesh]) -> TreeMesh:
 
     :return octree: A global Octree.
     """
-    cell_size = []
-    dimensions = None
-    origin = None
-
-    for mesh in meshes:
-        attributes = get_octree_attributes(mesh)
+    # Open the workspace of the octrees once for all attribute reads
+    workspace = next(
+        (mesh.workspace for mesh in meshes if isinstance(mesh, Octree)), None
+    )
+    with fetch_active_workspace(workspace):
+        attributes = [get_octree_attributes(mesh) for mesh in meshes]
 
-        if dimensions is None:
-            dimensions = attributes["dimensions"]
-            origin = attributes["origin"]
-        else:
-            if not np.allclose(dimensions, attributes["dimensions"]):
-                raise ValueError("Meshes must have same dimensions")
+    dimensions = np.asarray([attr["dimensions"] for attr in attributes])
+    origins = np.asarray([attr["origin"] for attr in attributes])
 
-            if not np.allclose(origin, attributes["origin"]):
-                raise ValueError("Meshes must have same origin")
+    if not np.allclose(dimensions, dimensions[0]):
+        raise ValueError("Meshes must have same dimensions")
 
-        cell_size.append(attributes["cell_size"])
+    if not np.allclose(origins, origins[0]):
+        raise ValueError("Meshes must have same origin")
 
-    cell_size = np.min(np.vstack(cell_size), axis=0)
-    cells = []
-    for ind in range(3):
-        if dimensions is not None and cell_size is not None:
-            extent = dimensions[ind]
-            max_level = int(np.ceil(np.log2(np.abs(extent / cell_size[ind]))))
-            cells += [np.ones(2**max_level) * cell_size[ind]]
+    cell_size = np.asarray([attr["cell_size"] for attr in attributes]).min(axis=0)
+    # Smallest power of two number of cells covering each dimension
+    max_levels = [
+        (math.ceil(abs(extent / size)) - 1).bit_length()
+        for extent, size in zip(dimensions[0], cell_size)
+    ]
+    cells = [
+        np.full(1 << level, size, dtype=float)
+        for level, size in zip(max_levels, cell_size)
+    ]
 
     # Define the mesh and origin
-    treemesh = TreeMesh(cells, origin=origin)
+    treemesh = TreeMesh(cells, origin=origins[0])
 
+    # Gather the cells of all meshes for a single insertion
+    all_centers, all_levels = [], []
     for mesh in meshes:
         if isinstance(mesh, Octree) and mesh.octree_cells is not None:
             centers = mesh.centroids
-            levels = treemesh.max_level - np.log2(mesh.octree_cells["NCells"])
+            # Exact integer log2 of the power of two cell counts
+            levels = np.frexp(mesh.octree_cells["NCells"])[1]
+            np.subtract(treemesh.max_level + 1, levels, out=levels)
         elif isinstance(mesh, TreeMesh):
             centers = mesh.cell_centers
-            levels = (
-                treemesh.max_level
-                - mesh.max_level
-                + mesh.cell_levels_by_index(np.arange(mesh.nC))
-            )
+            levels = mesh.cell_levels_by_index(np.arange(mesh.nC))
+            levels += treemesh.max_level - mesh.max_level
         else:
             raise TypeError(
                 f"All meshes must be Octree or TreeMesh, not {type(mesh)} "
                 "and must have octree cells defined."
             )
 
-        treemesh.insert_cells(centers, levels, finalize=False)
+        all_centers.append(centers)
+        all_levels.append(levels)
 
+    # Insert in the storage order of the tree
+    centers = np.vstack(all_centers)
+    order = morton_order(
+        centers,
+        treemesh.origin,
+        np.r_[treemesh.h[0][0], treemesh.h[1][0], treemesh.h[2][0]],
+    )
+    treemesh.insert_cells(
+        centers[order], np.concatenate(all_levels)[order], finalize=False
+    )
     treemesh.finalize()
 
     return treemesh
 
 
-def collocate_octrees(global_mesh: Octree, local_meshes: list[Octree]):
+def collocate_octrees(  # pylint: disable=too-many-locals
+    global_mesh: Octree, local_meshes: list[Octree]
+):
     """
     Collocate a list of octree meshes into a global octree mesh.
 
@@ -99,56 +177,118 @@ def collocate_octrees(global_mesh: Octree, local_meshes: list[Octree]):
     ):
         raise ValueError("Global mesh must have octree_cells and cell sizes.")
 
-    u_grid = global_mesh.octree_cells["I"] * global_mesh.u_cell_size
-    v_grid = global_mesh.octree_cells["J"] * global_mesh.v_cell_size
-    w_grid = global_mesh.octree_cells["K"] * global_mesh.w_cell_size
+    if not local_meshes:
+        return
 
-    xyz = np.c_[u_grid, v_grid, w_grid] + attributes["origin"]
-    tree = cKDTree(xyz)
-
-    for local_mesh in local_meshes:
-        attributes = get_octree_attributes(local_mesh)
-
-        if cell_size and cell_size != attributes["cell_size"]:
+    local_attributes = [get_octree_attributes(mesh) for mesh in local_meshes]
+    for local_attribute in local_attributes:
+        if cell_size and cell_size != local_attribute["cell_size"]:
             raise ValueError(
-                f"Cell size mismatch in dimension {cell_size} != {attributes['cell_size']}"
+                f"Cell size mismatch in dimension {cell_size} != "
+                f"{local_attribute['cell_size']}"
             )
 
-        _, closest = tree.query(attributes["origin"])
-        shift = xyz[closest, :] - attributes["origin"]
+    # Fill the cell corners column-wise in a single buffer
+    octree_cells = global_mesh.octree_cells
+    xyz = np.empty((octree_cells.shape[0], 3))
+    for axis, (index, size) in enumerate(zip("IJK", cell_size)):
+        np.multiply(octree_cells[index], size, out=xyz[:, axis])
+
+    xyz += attributes["origin"]
 
+    # Nearest global node to every local origin
+    origins = np.vstack([attr["origin"] for attr in local_attributes])
+
+    # A brute force search is cheaper than building a tree for a few origins
+    if origins.shape[0] * xyz.shape[0] <= 5e7:
+        closest = np.empty(origins.shape[0], dtype=int)
+        for ind, origin in enumerate(origins):
+            delta = xyz - origin
+            closest[ind] = np.argmin(np.einsum("ij,ij->i", delta, delta))
+    else:
+        # Queried once only, favour a fast unbalanced build
+        tree = cKDTree(xyz, leafsize=32, balanced_tree=False, compact_nodes=False)
+        _, closest = tree.query(origins, workers=-1)
+
+    shifts = xyz[closest, :] - origins
+
+    # Group the meshes to shift by workspace, opened once each
+    groups: dict[int, list] = {}
+    for local_mesh, origin, shift in zip(local_meshes, origins, shifts):
         if np.any(shift != 0.0):
-            with fetch_active_workspace(local_mesh.workspace) as workspace:
+            groups.setdefault(id(local_mesh.workspace), []).append(
+                (local_mesh, origin, shift)
+            )
+
+    for group in groups.values():
+        with fetch_active_workspace(group[0][0].workspace) as workspace:
+            for local_mesh, origin, shift in group:
                 warning(
                     f"Shifting {local_mesh.name} mesh origin by {shift} m to match inversion mesh."
                 )
-                local_mesh.origin = attributes["origin"] + shift
+                local_mesh.origin = origin + shift
                 workspace.update_attribute(local_mesh, "attributes")
 
 
+DENSIFIED_CURVES = DigestCache(maxsize=4)
+
+
 def densify_curve(curve: Curve, increment: float) -> np.ndarray:
     """
     Refine a curve by adding points along the curve at a given increment.
 
+    Results are memoized on a digest of the curve geometry and the increment,
+    so repeated refinements along the same curve reuse the densified locations.
+
     :param curve: Curve object to be refined.
     :param increment: Distance between points along the curve.
 
-    :return: Array of shape (n, 3) of x, y, z locations.
+    :return: Read-only array of shape (n, 3) of x, y, z locations.
+    """
+    if curve.cells is None or curve.vertices is None:
+        raise ValueError("Curve object must have vertices and cells.")
+
+    vertices, cells, parts = curve.vertices, curve.cells, curve.parts
+
+    return DENSIFIED_CURVES(
+        (array_digest(vertices, cells, parts), float(increment)),
+        lambda: densify_segments(vertices, cells, parts, increment),
+    )
+
+
+def densify_segments(
+    vertices: np.ndarray, cells: np.ndarray, parts: np.ndarray, increment: float
+) -> np.ndarray:
+    """
+    Resample the parts of a set of line segments at a given increment.
+
+    :param vertices: Array of shape (n, 3) of x, y, z vertices.
+    :param cells: Array of shape (m, 2) of vertex indices per segment.
+    :param parts: Array of shape (n,) of vertex part ids.
+    :param increment: Distance between points along the segments.
+
+    :return: Read-only array of shape (n, 3) of x, y, z locations.
     """
+    # Group the segments within a same part with a single stable sort
+    cell_parts = parts[cells]
+    within = cell_parts[:, 0] == cell_parts[:, 1]
+    cell_parts = cell_parts[within, 0]
+    order = np.argsort(cell_parts, kind="stable")
+    boundaries = np.flatnonzero(np.diff(cell_parts[order])) + 1
+
     locations = []
-    for part in curve.unique_parts:
-        if curve.cells is not None and curve.vertices is not None:
-            logic = curve.parts == part
-            cells = curve.cells[np.all(logic[curve.cells], axis=1)]
+    for part_cells in np.split(cells[within][order], boundaries):
+        if len(part_cells) == 0:
+            continue
 
-            if len(cells) == 0:
-                continue
+        vert_ind = np.r_[part_cells[:, 0], part_cells[-1, 1]]
+        locs = vertices[vert_ind, :]
+        locations.append(resample_locations(locs, increment))
 
-            vert_ind = np.r_[cells[:, 0], cells[-1, 1]]
-            locs = curve.vertices[vert_ind, :]
-            locations.append(resample_locations(locs, increment))
+    resampled = np.vstack(locations)
+    resampled.flags.writeable = False
 
-    return np.vstack(locations)
+    return resampled
 
 
 def get_neighbouring_cells(mesh: TreeMesh, indices: list | np.ndarray) -> tuple:
@@ -170,15 +310,22 @@ def get_neighbouring_cells(mesh: TreeMesh, indices: list | np.ndarray) -> tuple:
     if not isinstance(mesh, TreeMesh):
         raise TypeError("Input 'mesh' must be a discretize.TreeMesh object.")
 
-    neighbors: dict[int, list] = {ax: [[], []] for ax in range(mesh.dim)}
+    # Flat lists of indices per axis and side, converted once at the end
+    neighbors: list[list[int]] = [[] for _ in range(2 * mesh.dim)]
 
     for ind in indices:
-        for ax in range(mesh.dim):
-            neighbors[ax][0].append(np.r_[mesh[ind].neighbors[ax * 2]])
-            neighbors[ax][1].append(np.r_[mesh[ind].neighbors[ax * 2 + 1]])
+        # Build the cell and its neighbor lists once for all axes
+        for side, cell_neighbors in zip(neighbors, mesh[ind].neighbors):
+            if isinstance(cell_neighbors, list):
+                side.extend(cell_neighbors)
+            else:
+                side.append(cell_neighbors)
 
     return tuple(
-        (np.r_[tuple(neighbors[ax][0])], np.r_[tuple(neighbors[ax][1])])
+        (
+            np.asarray(neighbors[ax * 2], dtype=int),
+            np.asarray(neighbors[ax * 2 + 1], dtype=int),
+        )
         for ax in range(mesh.dim)
     )
 
@@ -207,13 +354,11 @@ def get_octree_attributes(mesh: Octree | TreeMesh) -> dict[str, list]:
             for str_dim in "uvw":
                 cell_size.append(getattr(mesh, f"{str_dim}_cell_size"))
                 cell_count.append(getattr(mesh, f"{str_dim}_count"))
-                dimensions.append(
-                    getattr(mesh, f"{str_dim}_cell_size")
-                    * getattr(mesh, f"{str_dim}_count")
-                )
-            origin = np.r_[mesh.origin["x"], mesh.origin["y"], mesh.origin["z"]]
+                dimensions.append(cell_size[-1] * cell_count[-1])
+            record = mesh.origin
+            origin = np.array([record["x"], record["y"], record["z"]], dtype=float)
 
-    extent = np.r_[origin, origin + np.r_[dimensions]]
+    extent = np.concatenate([origin, origin + np.asarray(dimensions)])
 
     return {
         "cell_count": cell_count,
@@ -224,6 +369,41 @@ def get_octree_attributes(mesh: Octree | TreeMesh) -> dict[str, list]:
     }
 
 
+def morton_order(
+    locations: np.ndarray, origin: np.ndarray, cell_size: np.ndarray
+) -> np.ndarray:
+    """
+    Sort locations along the Morton (z-order) curve of a regular grid.
+
+    This is the order in which discretize stores the cells of a TreeMesh,
+    so inserting cells sorted this way keeps the tree traversal local.
+
+    :param locations: Array of shape (n, 3) of x, y, z locations.
+    :param origin: Origin of the grid.
+    :param cell_size: Grid cell size along each axis.
+
+    :return: Indices sorting the locations, as from np.argsort.
+    """
+    indices = np.floor((locations - origin) / cell_size).astype(np.int64)
+    codes = np.zeros(indices.shape[0], dtype=np.uint64)
+
+    for axis in range(3):
+        # Spread the lower 21 bits of the index, two zeros between each bit
+        bits = indices[:, axis].astype(np.uint64) & np.uint64(0x1FFFFF)
+        for shift, mask in [
+            (32, 0x1F00000000FFFF),
+            (16, 0x1F0000FF0000FF),
+            (8, 0x100F00F00F00F00F),
+            (4, 0x10C30C30C30C30C3),
+            (2, 0x1249249249249249),
+        ]:
+            bits = (bits | bits << np.uint64(shift)) & np.uint64(mask)
+
+        codes |= bits << np.uint64(axis)
+
+    return np.argsort(codes, kind="stable")
+
+
 def octree_2_treemesh(  # pylint: disable=too-many-locals
     mesh: Octree,
 ) -> discretize.TreeMesh | None:
@@ -254,7 +434,7 @@ def octree_2_treemesh(  # pylint: disable=too-many-locals
 
         n_cell_dim.append(getattr(mesh, f"{ax}_count"))
         cell_sizes.append(
-            np.ones(getattr(mesh, f"{ax}_count")) * getattr(mesh, f"{ax}_cell_size")
+            np.full(getattr(mesh, f"{ax}_count"), getattr(mesh, f"{ax}_cell_size"))
         )
 
     if any(np.any(cell_size < 0) for cell_size in cell_sizes):
@@ -267,15 +447,105 @@ def octree_2_treemesh(  # pylint: disable=too-many-locals
     else:
         max_level = min(ls) + 1
 
-    cells = np.vstack(mesh.octree_cells.tolist())
-    indexes = cells[:, :-1] * 2 + cells[:, -1][:, None]  # convert to cpp index
-    levels = max_level - np.log2(cells[:, -1])
+    # Read the structured fields directly, no round-trip through Python tuples
+    cells = mesh.octree_cells
+    n_cells = cells["NCells"].astype(np.int64)
+    indexes = np.empty((n_cells.size, 3), dtype=np.int64)
+    for axis, field in enumerate("IJK"):
+        # Convert to cpp index in a single pass per column
+        np.multiply(cells[field], 2, out=indexes[:, axis])
+        indexes[:, axis] += n_cells
+    levels = max_level + 1 - np.frexp(n_cells)[1]
     treemesh = TreeMesh(cell_sizes, x0=np.asarray(mesh.origin.tolist()))
     treemesh.__setstate__((indexes, levels))
 
     return treemesh
 
 
+def rasterize_triangulation(  # pylint: disable=too-many-locals
+    vertices: np.ndarray,
+    simplices: np.ndarray,
+    x_grid: np.ndarray,
+    y_grid: np.ndarray,
+    block_size: int = 2**20,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Flag and interpolate the nodes of a regular xy grid falling inside a
+    triangulation.
+
+    Triangles are grouped by the shape of the block of grid nodes covered by
+    their bounding box, and a barycentric test is evaluated over all the
+    blocks of a group at once. The elevation of the nodes inside is linearly
+    interpolated from the triangle vertices.
+
+    :param vertices: Array of shape (n, 3) of x, y, z triangle vertices.
+    :param simplices: Array of shape (m, 3) of vertex indices per triangle.
+    :param x_grid: Sorted, regularly spaced grid coordinates along x.
+    :param y_grid: Sorted, regularly spaced grid coordinates along y.
+    :param block_size: Maximum number of grid nodes tested per batch.
+
+    :return: Boolean mask and elevations, both arrays of shape
+        (y_grid.size, x_grid.size). Elevations are NaN outside the mask.
+    """
+    mask = np.zeros((y_grid.size, x_grid.size), dtype=bool)
+    elevation = np.full(mask.shape, np.nan)
+    triangles = vertices[simplices, :]
+    lower = triangles[:, :, :2].min(axis=1)
+    upper = triangles[:, :, :2].max(axis=1)
+    x_start = np.searchsorted(x_grid, lower[:, 0], side="left")
+    widths = np.searchsorted(x_grid, upper[:, 0], side="right") - x_start
+    y_start = np.searchsorted(y_grid, lower[:, 1], side="left")
+    heights = np.searchsorted(y_grid, upper[:, 1], side="right") - y_start
+    tol = np.finfo(float).eps * 10
+
+    # Edges and areas of all triangles, only keep the ones covering nodes
+    origins = triangles[:, 0]
+    edges_1 = triangles[:, 1] - origins
+    edges_2 = triangles[:, 2] - origins
+    areas = edges_1[:, 0] * edges_2[:, 1] - edges_1[:, 1] * edges_2[:, 0]
+    active = np.flatnonzero((widths > 0) & (heights > 0) & (areas != 0))
+
+    # Sort the triangles by block shape, one batch per shape (and per chunk)
+    shapes = heights[active] * (widths.max(initial=0) + 1) + widths[active]
+    order = np.argsort(shapes, kind="stable")
+    active = active[order]
+    _, first, counts = np.unique(shapes[order], return_index=True, return_counts=True)
+
+    for group_start, count in zip(first, counts):
+        height, width = heights[active[group_start]], widths[active[group_start]]
+        step = max(1, block_size // (height * width))
+
+        for chunk in range(group_start, group_start + count, step):
+            ids = active[chunk : min(chunk + step, group_start + count)]
+            rows = y_start[ids, None] + np.arange(height)
+            cols = x_start[ids, None] + np.arange(width)
+            delta_x = (x_grid[cols] - origins[ids, 0, None])[:, None, :]
+            delta_y = (y_grid[rows] - origins[ids, 1, None])[:, :, None]
+            area = areas[ids, None, None]
+            u_coord = (
+                delta_x * edges_2[ids, 1, None, None]
+                - delta_y * edges_2[ids, 0, None, None]
+            ) / area
+            v_coord = (
+                delta_y * edges_1[ids, 0, None, None]
+                - delta_x * edges_1[ids, 1, None, None]
+            ) / area
+            inside = (
+                (u_coord >= -tol) & (v_coord >= -tol) & (u_coord + v_coord <= 1 + tol)
+            )
+
+            index, row, col = np.nonzero(inside)
+            triangle = ids[index]
+            mask[rows[index, row], cols[index, col]] = True
+            elevation[rows[index, row], cols[index, col]] = (
+                origins[triangle, 2]
+                + u_coord[inside] * edges_1[triangle, 2]
+                + v_coord[inside] * edges_2[triangle, 2]
+            )
+
+    return mask, elevation
+
+
 def resample_locations(locations: np.ndarray, increment: float) -> np.ndarray:
     """
     Resample locations along a sequence of positions at a given increment.
@@ -288,16 +558,60 @@ def resample_locations(locations: np.ndarray, increment: float) -> np.ndarray:
     distance = np.cumsum(
         np.r_[0, np.linalg.norm(locations[1:, :] - locations[:-1, :], axis=1)]
     )
-    new_distances = np.sort(
-        np.unique(np.r_[distance, np.arange(0, distance[-1], increment)])
+    new_distances = np.unique(np.r_[distance, np.arange(0, distance[-1], increment)])
+
+    # Shared bracketing of the new distances, then linear blend of all axes
+    upper = np.searchsorted(distance, new_distances, side="right")
+    upper = np.clip(upper, 1, len(distance) - 1)
+    lower = upper - 1
+    length = distance[upper] - distance[lower]
+    weight = np.divide(
+        new_distances - distance[lower],
+        length,
+        out=np.zeros_like(new_distances),
+        where=length > 0,
+    )[:, None]
+
+    return locations[lower] * (1.0 - weight) + locations[upper] * weight
+
+
+SURFACE_TRIANGULATIONS = DigestCache(maxsize=2)
+SURFACE_TREES = DigestCache(maxsize=2)
+
+
+def surface_triangulation(xyz: np.ndarray, digest: bytes | None = None) -> Delaunay:
+    """
+    Triangulate surface vertices in plan view.
+
+    Memoized on a digest of the vertices, so repeated refinements on the
+    same surface reuse the triangulation.
+
+    :param xyz: Array of shape (n, 3) of vertices.
+    :param digest: Digest of the vertices from :func:`array_digest`,
+        computed if not provided.
+
+    :return: Delaunay triangulation of the vertices xy coordinates.
+    """
+    return SURFACE_TRIANGULATIONS(
+        array_digest(xyz) if digest is None else digest,
+        lambda: Delaunay(xyz[:, :2]),
     )
 
-    resampled = []
-    for axis in locations.T:
-        interpolator = interp1d(distance, axis, kind="linear")
-        resampled.append(interpolator(new_distances))
 
-    return np.c_[resampled].T
+def surface_tree(xyz: np.ndarray, digest: bytes | None = None) -> cKDTree:
+    """
+    Build a kd-tree of surface vertices in plan view.
+
+    :param xyz: Array of shape (n, 3) of vertices.
+    :param digest: Digest of the vertices from :func:`array_digest`,
+        computed if not provided.
+
+    :return: Tree of the vertices xy coordinates.
+    """
+    return SURFACE_TREES(
+        array_digest(xyz) if digest is None else digest,
+        lambda: cKDTree(xyz[:, :2]),
+    )
 
 
 def treemesh_2_octree(
@@ -318,8 +632,11 @@ def treemesh_2_octree(
     index_array = np.asarray(treemesh.cell_state["indexes"])
     levels = np.asarray(treemesh.cell_state["levels"])
 
-    new_levels = 2 ** (treemesh.max_level - levels)
-    new_index_array = (index_array - new_levels[:, None]) / 2
+    # Fill the ubc index and cell count columns in a single buffer
+    octree_cells = np.empty((levels.size, 4), dtype=np.int32)
+    np.left_shift(1, treemesh.max_level - levels, out=octree_cells[:, 3])
+    np.subtract(index_array, octree_cells[:, 3:], out=octree_cells[:, :3])
+    octree_cells[:, :3] //= 2
 
     origin = treemesh.x0.copy()
 
@@ -332,8 +649,47 @@ def treemesh_2_octree(
         u_cell_size=treemesh.h[0][0],
         v_cell_size=treemesh.h[1][0],
         w_cell_size=treemesh.h[2][0],
-        octree_cells=np.c_[new_index_array, new_levels],
+        octree_cells=octree_cells,
         **kwargs,
     )
 
     return mesh_object
+
+
+def vertex_normals(vertices: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    """
+    Compute the unit normals at the vertices of a triangulation.
+
+    The area-weighted normals of all triangles sharing a vertex are summed
+    with a single buffered reduction per component.
+
+    :param vertices: Array of shape (n, 3) of x, y, z vertices.
+    :param cells: Array of shape (m, 3) of vertex indices per triangle.
+
+    :return: Array of shape (n, 3) of unit normals.
+    """
+    # Edge vectors and normals of triangles as component rows (SoA)
+    coordinates = np.ascontiguousarray(vertices.T)
+    origins = coordinates[:, cells[:, 0]]
+    edge_1 = coordinates[:, cells[:, 1]] - origins
+    edge_2 = coordinates[:, cells[:, 2]] - origins
+    normals = (
+        edge_1[1] * edge_2[2] - edge_1[2] * edge_2[1],
+        edge_1[2] * edge_2[0] - edge_1[0] * edge_2[2],
+        edge_1[0] * edge_2[1] - edge_1[1] * edge_2[0],
+    )
+
+    vert_ids = cells.ravel()
+    average_normals = np.column_stack(
+        [
+            np.bincount(
+                vert_ids,
+                weights=np.repeat(component, cells.shape[1]),
+                minlength=vertices.shape[0],
+            )
+            for component in normals
+        ]
+    ).astype(float, copy=False)
+    average_normals /= np.linalg.norm(average_normals, axis=1)[:, None]
+
+    return average_normals
@@ -26,20 +26,52 @@ from octree_creation_app.utils import octree_2_treemesh, treemesh_2_octree
 # pylint: disable=redefined-outer-name, duplicate-code
 
 
-def test_create_octree_radial(
-    tmp_path: Path, setup_test_octree
-):  # pylint: disable=too-many-locals
+def run_driver(
+    tmp_path: Path, workspace: Workspace, setup_test_octree, objects, **kwargs
+) -> Octree:
+    """
+    Run the OctreeDriver with the fixture parameters and a single refinement
+    on the given object.
+    """
     (
         cell_sizes,
         depth_core,
         horizontal_padding,
-        locations,
+        _,
         minimum_level,
         refinement,
-        treemesh,
+        _,
         vertical_padding,
     ) = setup_test_octree
 
+    params_dict = {
+        "geoh5": workspace,
+        "objects": objects,
+        "u_cell_size": cell_sizes[0],
+        "v_cell_size": cell_sizes[1],
+        "w_cell_size": cell_sizes[2],
+        "horizontal_padding": horizontal_padding,
+        "vertical_padding": vertical_padding,
+        "depth_core": depth_core,
+        "diagonal_balance": False,
+        "Refinement A object": objects,
+        "Refinement A levels": refinement,
+        "Refinement A horizon": False,
+        "Refinement B object": None,
+        "minimum_level": minimum_level,
+    }
+    params_dict.update(kwargs)
+    params = OctreeParams(**params_dict)
+    params.write_input_file(name="testOctree", path=tmp_path, validate=False)
+
+    return OctreeDriver(params).run()
+
+
+def test_create_octree_radial(
+    tmp_path: Path, setup_test_octree
+):  # pylint: disable=too-many-locals
+    _, _, _, locations, minimum_level, refinement, treemesh, _ = setup_test_octree
+
     with Workspace.create(tmp_path / "testOctree.geoh5") as workspace:
         points = Points.create(workspace, vertices=locations)
         treemesh.refine(treemesh.max_level - minimum_level + 1, finalize=False)
@@ -57,49 +89,18 @@ def test_create_octree_radial(
 
         assert OctreeDriver.cell_size_from_level(treemesh, 1) == 10.0
 
-        params_dict = {
-            "geoh5": workspace,
-            "objects": points,
-            "u_cell_size": cell_sizes[0],
-            "v_cell_size": cell_sizes[1],
-            "w_cell_size": cell_sizes[2],
-            "horizontal_padding": horizontal_padding,
-            "vertical_padding": vertical_padding,
-            "depth_core": depth_core,
-            "diagonal_balance": False,
-            "Refinement A object": points.uid,
-            "Refinement A levels": refinement,
-            "Refinement A horizon": False,
-            "Refinement B object": None,
-            "minimum_level": minimum_level,
-        }
-        params = OctreeParams(**params_dict)
-        params.write_input_file(name="testOctree", path=tmp_path, validate=False)
-        driver = OctreeDriver(params)
-        driver.run()
-
-        rec_octree = workspace.get_entity("Octree_Mesh")[0]
+        rec_octree = run_driver(tmp_path, workspace, setup_test_octree, points)
         compare_entities(octree, rec_octree, ignore=["_uid"])
 
 
 def test_create_octree_surface(
     tmp_path: Path, setup_test_octree
 ):  # pylint: disable=too-many-locals
-    (
-        cell_sizes,
-        depth_core,
-        horizontal_padding,
-        locations,
-        minimum_level,
-        refinement,
-        treemesh,
-        vertical_padding,
-    ) = setup_test_octree
+    _, _, _, locations, minimum_level, refinement, treemesh, _ = setup_test_octree
 
     with Workspace.create(tmp_path / "testOctree.geoh5") as workspace:
-        simplices = np.unique(
-            np.random.randint(0, locations.shape[0] - 1, (locations.shape[0], 3)),
-            axis=1,
+        simplices = np.random.default_rng(0).integers(
+            0, locations.shape[0] - 1, (locations.shape[0], 3)
         )
 
         surface = Surface.create(
@@ -128,45 +129,20 @@ def test_create_octree_surface(
             168396,
         ]  # Different results on Linux and Windows
 
-        params_dict = {
-            "geoh5": workspace,
-            "objects": surface,
-            "u_cell_size": cell_sizes[0],
-            "v_cell_size": cell_sizes[1],
-            "w_cell_size": cell_sizes[2],
-            "horizontal_padding": horizontal_padding,
-            "vertical_padding": vertical_padding,
-            "depth_core": depth_core,
-            "diagonal_balance": False,
-            "Refinement A object": surface,
-            "Refinement A levels": refinement,
-            "Refinement A horizon": True,
-            "Refinement A distance": 1000.0,
-            "Refinement B object": None,
-            "minimum_level": minimum_level,
-        }
-        params = OctreeParams(**params_dict)
-        params.write_input_file(name="testOctree", path=tmp_path, validate=False)
-        driver = OctreeDriver(params)
-        driver.run()
-
-        rec_octree = workspace.get_entity("Octree_Mesh")[0]
+        rec_octree = run_driver(
+            tmp_path,
+            workspace,
+            setup_test_octree,
+            surface,
+            **{"Refinement A horizon": True, "Refinement A distance": 1000.0},
+        )
         compare_entities(octree, rec_octree, ignore=["_uid"])
 
 
 def test_create_octree_curve(
     tmp_path: Path, setup_test_octree
 ):  # pylint: disable=too-many-locals
-    (
-        cell_sizes,
-        depth_core,
-        horizontal_padding,
-        locations,
-        minimum_level,
-        refinement,
-        treemesh,
-        vertical_padding,
-    ) = setup_test_octree
+    _, _, _, locations, minimum_level, refinement, treemesh, _ = setup_test_octree
 
     with Workspace.create(tmp_path / "testOctree.geoh5") as workspace:
         curve = Curve.create(workspace, vertices=locations)
@@ -186,59 +162,33 @@ def test_create_octree_curve(
         octree = treemesh_2_octree(workspace, treemesh, name="Octree_Mesh")
         assert octree.n_cells == 176915
 
-        params_dict = {
-            "geoh5": workspace,
-            "objects": curve,
-            "u_cell_size": cell_sizes[0],
-            "v_cell_size": cell_sizes[1],
-            "w_cell_size": cell_sizes[2],
-            "horizontal_padding": horizontal_padding,
-            "vertical_padding": vertical_padding,
-            "depth_core": depth_core,
-            "diagonal_balance": False,
-            "Refinement A object": curve,
-            "Refinement A levels": refinement,
-            "Refinement A horizon": False,
-            "Refinement B object": None,
-            "minimum_level": minimum_level,
-        }
-        params = OctreeParams(**params_dict)
-        params.write_input_file(name="testOctree", path=tmp_path, validate=False)
-        driver = OctreeDriver(params)
-        driver.run()
-
-        results = driver.params.geoh5.get_entity("Octree_Mesh")
-        compare_entities(results[0], results[1], ignore=["_uid"])
+        rec_octree = run_driver(tmp_path, workspace, setup_test_octree, curve)
+        compare_entities(octree, rec_octree, ignore=["_uid"])
 
 
 def test_create_octree_triangulation(
     tmp_path: Path, setup_test_octree
 ):  # pylint: disable=too-many-locals
-    (
-        cell_sizes,
-        depth_core,
-        horizontal_padding,
-        locations,
-        minimum_level,
-        refinement,
-        treemesh,
-        vertical_padding,
-    ) = setup_test_octree
+    _, _, _, locations, minimum_level, _, treemesh, _ = setup_test_octree
 
     # Generate a sphere of points
     phi, theta = np.meshgrid(
-        np.linspace(-np.pi / 2.0, np.pi / 2.0, 32), np.linspace(-np.pi, np.pi, 32)
+        np.linspace(-np.pi / 2.0, np.pi / 2.0, 16), np.linspace(-np.pi, np.pi, 16)
     )
     surf = Delaunay(np.c_[phi.flatten(), theta.flatten()])
-    x = np.cos(phi) * np.cos(theta) * 200.0
-    y = np.cos(phi) * np.sin(theta) * 200.0
-    z = np.sin(phi) * 200.0
+    cos_phi = np.cos(phi)
+    vertices = np.c_[
+        (cos_phi * np.cos(theta)).ravel(),
+        (cos_phi * np.sin(theta)).ravel(),
+        np.sin(phi).ravel(),
+    ]
+    vertices *= 200.0
     # refinement = "1, 2"
     with Workspace.create(tmp_path / "testOctree.geoh5") as workspace:
         curve = Curve.create(workspace, vertices=locations)
         sphere = Surface.create(
             workspace,
-            vertices=np.c_[x.flatten(), y.flatten(), z.flatten()],
+            vertices=vertices,
             cells=surf.simplices,
         )
         treemesh.refine(
@@ -255,33 +205,41 @@ def test_create_octree_triangulation(
         )
         octree = treemesh_2_octree(workspace, treemesh, name="Octree_Mesh")
 
-        assert octree.n_cells == 267957
+        assert octree.n_cells == 265626
 
-        params_dict = {
-            "geoh5": workspace,
-            "objects": curve,
-            "u_cell_size": cell_sizes[0],
-            "v_cell_size": cell_sizes[1],
-            "w_cell_size": cell_sizes[2],
-            "horizontal_padding": horizontal_padding,
-            "vertical_padding": vertical_padding,
-            "depth_core": depth_core,
-            "diagonal_balance": False,
-            "Refinement A object": sphere,
-            "Refinement A levels": refinement,
-            "Refinement A horizon": False,
-            "Refinement B object": None,
-            "minimum_level": minimum_level,
-        }
-        params = OctreeParams(**params_dict)
-        params.write_input_file(name="testOctree", path=tmp_path, validate=False)
-        driver = OctreeDriver(params)
-        driver.run()
-
-        rec_octree = workspace.get_entity("Octree_Mesh")[0]
+        rec_octree = run_driver(
+            tmp_path,
+            workspace,
+            setup_test_octree,
+            curve,
+            **{"Refinement A object": sphere, "Refinement A levels": "3, 3"},
+        )
         compare_entities(octree, rec_octree, ignore=["_uid"])
 
 
+@pytest.mark.parametrize(
+    "method",
+    [
+        "refine_tree_from_surface",
+        "refine_tree_from_triangulation",
+        "refine_tree_from_points",
+    ],
+)
+def test_refine_zero_levels(tmp_path: Path, setup_test_octree, method):
+    _, _, _, locations, minimum_level, _, treemesh, _ = setup_test_octree
+
+    with Workspace.create(tmp_path / "testOctree.geoh5") as workspace:
+        surface = Surface.create(
+            workspace, vertices=locations, cells=Delaunay(locations[:, :2]).simplices
+        )
+        treemesh.refine(treemesh.max_level - minimum_level + 1, finalize=True)
+        n_cells = treemesh.n_cells
+
+        # Disabled refinements leave the (finalized) mesh untouched
+        treemesh = getattr(OctreeDriver, method)(treemesh, surface, [0, 0])
+        assert treemesh.n_cells == n_cells
+
+
 @pytest.mark.parametrize(
     "diagonal_balance, exp_values, exp_counts",
     [(True, [0, 1], [22, 10]), (False, [0, 1, 2], [22, 8, 2])],
@@ -319,7 +277,6 @@ def test_octree_diagonal_balance(  # pylint: disable=too-many-locals
     OctreeDriver.start(tmp_path / filename)
 
     with workspace.open(mode="r"):
-        results = []
         mesh_obj = workspace.get_entity("mesh")[0]
 
         assert isinstance(mesh_obj, Octree)
@@ -333,23 +290,23 @@ def test_octree_diagonal_balance(  # pylint: disable=too-many-locals
         starting_cell = treemesh[ind]
 
         level = starting_cell._level  # pylint: disable=protected-access
+        second_neighbors = []
         for first_neighbor in starting_cell.neighbors:
-            neighbors = []
             for neighbor in treemesh[first_neighbor].neighbors:
                 if isinstance(neighbor, list):
-                    neighbors += neighbor
+                    second_neighbors += neighbor
                 else:
-                    neighbors.append(neighbor)
-
-            for second_neighbor in neighbors:
-                compare_cell = treemesh[second_neighbor]
-                if set(starting_cell.nodes) & set(compare_cell.nodes):
-                    results.append(
-                        np.abs(
-                            level
-                            - compare_cell._level  # pylint: disable=protected-access
-                        )
-                    )
+                    second_neighbors.append(neighbor)
+
+        # Fetch each distinct cell once, then expand back to every occurrence
+        indices, inverse = np.unique(second_neighbors, return_inverse=True)
+        compare_cells = [treemesh[index] for index in indices]
+        nodes = np.array([cell.nodes for cell in compare_cells], dtype=np.int64)
+        levels = np.array(
+            [cell._level for cell in compare_cells]  # pylint: disable=protected-access
+        )
+        touching = np.isin(nodes, starting_cell.nodes).any(axis=1)[inverse]
+        results = np.abs(level - levels[inverse][touching])
 
         values, counts = np.unique(results, return_counts=True)
 
@@ -357,10 +314,80 @@ def test_octree_diagonal_balance(  # pylint: disable=too-many-locals
         assert (counts == np.array(exp_counts)).all()
 
 
+def test_octree_start_closed_workspace(tmp_path: Path, setup_test_octree):
+    """
+    Surface and curve geometries are read while the workspace is open, before
+    refining with the workspace closed.
+    """
+    cell_sizes, depth_core, _, locations, _, _, _, _ = setup_test_octree
+
+    workspace = Workspace.create(tmp_path / "testClosedWorkspace.geoh5")
+    with workspace.open(mode="r+"):
+        surface = Surface.create(
+            workspace, vertices=locations, cells=Delaunay(locations[:, :2]).simplices
+        )
+        # Two disjoint parts along the first and second half of the circle
+        curve = Curve.create(
+            workspace,
+            vertices=locations[:-1],
+            cells=np.r_[
+                np.c_[np.arange(7), np.arange(1, 8)],
+                np.c_[np.arange(8, 15), np.arange(9, 16)],
+            ],
+        )
+        assert len(curve.unique_parts) == 2
+
+        params = OctreeParams(
+            geoh5=workspace,
+            objects=str(surface.uid),
+            u_cell_size=cell_sizes[0],
+            v_cell_size=cell_sizes[1],
+            w_cell_size=cell_sizes[2],
+            horizontal_padding=100.0,
+            vertical_padding=100.0,
+            depth_core=depth_core,
+            diagonal_balance=False,
+            ga_group_name="mesh",
+            **{
+                "Refinement A object": surface.uid,
+                "Refinement A levels": "2, 2",
+                "Refinement A horizon": True,
+                "Refinement A distance": 100.0,
+                "Refinement B object": curve.uid,
+                "Refinement B levels": "2, 2",
+                "Refinement B horizon": False,
+            },
+        )
+        filename = "closed_workspace.ui.json"
+        params.write_input_file(name=filename, path=tmp_path, validate=False)
+
+        # Reference refinement from the geometries held in memory
+        expected = OctreeDriver.treemesh_from_params(params)
+
+    OctreeDriver.start(tmp_path / filename)
+
+    with workspace.open(mode="r"):
+        mesh_obj = workspace.get_entity("mesh")[0]
+
+        assert isinstance(mesh_obj, Octree)
+
+        treemesh = octree_2_treemesh(mesh_obj)
+
+        assert treemesh is not None
+        assert treemesh.n_cells == expected.n_cells
+        np.testing.assert_array_equal(treemesh.cell_centers, expected.cell_centers)
+        np.testing.assert_array_equal(
+            treemesh.cell_levels_by_index(np.arange(treemesh.n_cells)),
+            expected.cell_levels_by_index(np.arange(expected.n_cells)),
+        )
+
+
 def test_backward_compatible_type(tmp_path):
     workspace = Workspace.create(tmp_path / "testDiagonalBalance.geoh5")
     with workspace.open(mode="r+"):
-        points = Points.create(workspace, vertices=np.random.randn(5, 3))
+        points = Points.create(
+            workspace, vertices=np.random.default_rng(0).standard_normal((5, 3))
+        )
 
         # Repeat the creation using the app
         params_dict = {
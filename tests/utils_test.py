@@ -13,15 +13,22 @@ from discretize import TreeMesh
 from geoh5py import Workspace
 from geoh5py.objects import Curve, Octree, Points
 from geoh5py.shared.utils import fetch_active_workspace
+from scipy.interpolate import LinearNDInterpolator
+from scipy.spatial import Delaunay
 
 from octree_creation_app.utils import (
+    array_digest,
     collocate_octrees,
     create_octree_from_octrees,
     densify_curve,
     get_neighbouring_cells,
     get_octree_attributes,
+    morton_order,
     octree_2_treemesh,
+    rasterize_triangulation,
+    surface_triangulation,
     treemesh_2_octree,
+    vertex_normals,
 )
 
 
@@ -88,6 +95,30 @@ def test_collocate_octrees(tmp_path: Path):
                 )
 
 
+def test_collocate_octrees_snaps_origins(tmp_path: Path):
+    workspace = Workspace(tmp_path / "test.geoh5")
+
+    local_mesh = TreeMesh([[10] * 16, [10] * 16, [10] * 16], [1000, 0, 0])
+    local_mesh.insert_cells([120, 120, -40], local_mesh.max_level, finalize=True)
+    local_omesh = treemesh_2_octree(workspace, local_mesh)
+
+    # Global origin off the local grid
+    global_mesh = TreeMesh([[10] * 16, [10] * 16, [10] * 16], [1, 2, 3])
+    global_mesh.insert_cells([620, 300, -300], global_mesh.max_level, finalize=True)
+    global_omesh = treemesh_2_octree(workspace, global_mesh)
+
+    collocate_octrees(global_omesh, [local_omesh])
+
+    # Local origin is snapped onto the global grid
+    offset = (
+        np.r_[local_omesh.origin["x"], local_omesh.origin["y"], local_omesh.origin["z"]]
+        - np.r_[
+            global_omesh.origin["x"], global_omesh.origin["y"], global_omesh.origin["z"]
+        ]
+    )
+    np.testing.assert_allclose(offset, np.round(offset / 10.0) * 10.0)
+
+
 def test_create_octree_from_octrees():
     workspace = Workspace()
     mesh1 = TreeMesh([[10] * 16, [10] * 16, [10] * 16], [0, 0, 0])
@@ -104,18 +135,17 @@ def test_create_octree_from_octrees():
     resulting_mesh = create_octree_from_octrees([omesh1, omesh2])
     resulting_omesh = treemesh_2_octree(workspace, resulting_mesh)
 
-    in_both = []
-    for cell in resulting_omesh.centroids:
-        in_mesh1 = np.any(np.all(cell == omesh1.centroids, axis=1))
-        in_mesh2 = np.any(np.all(cell == omesh2.centroids, axis=1))
-        in_both.append(in_mesh1 or in_mesh2)
+    # Match every resulting cell against both inputs in one broadcast
+    centroids = np.vstack([omesh1.centroids, omesh2.centroids])
+    matches = np.all(resulting_omesh.centroids[:, None, :] == centroids, axis=2)
 
-    assert np.all(in_both)
+    assert np.all(np.any(matches, axis=1))
 
     # Compare with mesh from treemeshes
     new_mesh = create_octree_from_octrees([mesh1, mesh2])
 
-    assert [np.all(new_mesh.h[dim] == resulting_mesh.h[dim]) for dim in range(3)]
+    for new_h, resulting_h in zip(new_mesh.h, resulting_mesh.h):
+        np.testing.assert_array_equal(new_h, resulting_h)
     assert np.all(new_mesh.shape_cells == resulting_mesh.shape_cells)
     assert np.all(new_mesh.origin == resulting_mesh.origin)
 
@@ -154,6 +184,8 @@ def test_densify_curve(tmp_path: Path):
         )
         locations = densify_curve(curve, 2)
         assert locations.shape[0] == 11
+        assert not locations.flags.writeable
+        assert densify_curve(curve, 2) is locations
 
 
 def test_get_neighbouring_cells():
@@ -183,7 +215,10 @@ def test_get_neighbouring_cells():
     assert all(
         len(axis) == 2 for axis in neighbours
     ), "Incorrect number of neighbours returned."
-    assert np.allclose(np.r_[neighbours].flatten(), np.r_[76, 78, 75, 79, 73, 81])
+    np.testing.assert_array_equal(
+        np.concatenate([np.ravel(side) for axis in neighbours for side in axis]),
+        [76, 78, 75, 79, 73, 81],
+    )
 
 
 def test_get_octree_attributes_with_treemesh(setup_test_octree):
@@ -236,6 +271,17 @@ def test_get_octree_attributes_with_octree(setup_test_octree):
         )
 
 
+def test_morton_order():
+    mesh = TreeMesh([[10] * 16, [10] * 16, [10] * 16], [0, 0, 0])
+    mesh.refine(mesh.max_level, finalize=True)
+    order = np.random.default_rng(0).permutation(mesh.n_cells)
+
+    # Cells are stored along the z-order curve
+    sort = morton_order(mesh.cell_centers[order], mesh.origin, np.r_[10.0, 10.0, 10.0])
+
+    np.testing.assert_array_equal(order[sort], np.arange(mesh.n_cells))
+
+
 def test_octree_2_treemesh():
     with Workspace() as workspace:
         mesh = TreeMesh([[10] * 4, [10] * 4, [10] * 4], [0, 0, 0])
@@ -287,3 +333,68 @@ def test_treemesh_2_octree(tmp_path: Path):
         assert tmesh is not None
         np.testing.assert_allclose(tmesh.cell_centers, mesh.cell_centers)
         np.testing.assert_allclose(omesh.centroids, mesh.cell_centers)
+
+
+def test_rasterize_triangulation():
+    nodes = np.linspace(0, 2 * np.pi, 9)[:-1]
+    vertices = np.c_[np.cos(nodes) * 40.0, np.sin(nodes) * 30.0, np.sin(nodes * 2.0)]
+    triang = Delaunay(vertices[:, :2])
+    x_grid = np.arange(-50.0, 50.0, 2.5)
+    y_grid = np.arange(-40.0, 40.0, 2.5)
+
+    mask, elevation = rasterize_triangulation(
+        vertices, triang.simplices, x_grid, y_grid
+    )
+
+    assert mask.shape == elevation.shape == (y_grid.size, x_grid.size)
+
+    grid_x, grid_y = np.meshgrid(x_grid, y_grid)
+    grid = np.c_[grid_x.ravel(), grid_y.ravel()]
+    np.testing.assert_array_equal(mask.ravel(), triang.find_simplex(grid) != -1)
+    np.testing.assert_allclose(
+        elevation.ravel(),
+        LinearNDInterpolator(triang, vertices[:, 2])(grid),
+        atol=1e-12,
+    )
+
+    # Splitting the batches of triangles gives the same result
+    chunked = rasterize_triangulation(
+        vertices, triang.simplices, x_grid, y_grid, block_size=1
+    )
+    np.testing.assert_array_equal(chunked[0], mask)
+    np.testing.assert_array_equal(chunked[1], elevation)
+
+
+def test_surface_triangulation_cached():
+    xyz = np.c_[np.random.default_rng(0).standard_normal((10, 2)) * 10.0, np.zeros(10)]
+    triang = surface_triangulation(xyz)
+
+    assert triang.points.shape == (10, 2)
+    assert surface_triangulation(xyz.copy()) is triang
+    assert surface_triangulation(xyz, array_digest(xyz)) is triang
+
+    # Only the most recent surfaces are kept
+    for shift in range(1, 3):
+        surface_triangulation(xyz + shift)
+
+    assert surface_triangulation(xyz) is not triang
+
+
+def test_vertex_normals():
+    # Pyramid of four triangles sharing the apex
+    vertices = np.array(
+        [
+            [0.0, 0.0, 1.0],
+            [1.0, 0.0, 0.0],
+            [0.0, 1.0, 0.0],
+            [-1.0, 0.0, 0.0],
+            [0.0, -1.0, 0.0],
+        ]
+    )
+    cells = np.array([[0, 1, 2], [0, 2, 3], [0, 3, 4], [0, 4, 1]])
+
+    normals = vertex_normals(vertices, cells)
+
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1.0)
+    np.testing.assert_allclose(normals[0], [0.0, 0.0, 1.0], atol=1e-12)
+    np.testing.assert_allclose(normals[1], [1.0, 0.0, 1.0] / np.sqrt(2.0))